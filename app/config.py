@@ -3,8 +3,7 @@ import os
 from dataclasses import dataclass
 from datetime import time
 from pathlib import Path
-
-import pytz
+from zoneinfo import ZoneInfo
 
 
 @dataclass
@@ -24,16 +23,48 @@ class Settings:
     trailing_days: int = int(os.getenv("TRAILING_DAYS", "92"))
     timezone: str = os.getenv("TIMEZONE", "UTC")
 
+    # Garmin fetch concurrency (parallel daily requests)
+    fetch_workers: int = int(os.getenv("FETCH_WORKERS", "8"))
+
     # Data dirs
     data_root: str = os.getenv("DATA_ROOT", "/data")
     cache_dir: str = os.getenv("CACHE_DIR", "/data/cache")
     output_dir: str = os.getenv("OUTPUT_DIR", "/data/output")
 
+    # Pivot table format: "parquet" (default) or legacy "csv"
+    pivot_format: str = os.getenv("PIVOT_FORMAT", "parquet").lower()
+
     # File paths (derived from output_dir)
     @property
     def pivot_csv_path(self) -> str:
         return os.path.join(self.output_dir, "heart_rate_minutes_pivot_filled.csv")
 
+    @property
+    def pivot_parquet_path(self) -> str:
+        return os.path.join(self.output_dir, "heart_rate_minutes_pivot_filled.parquet")
+
+    @property
+    def pivot_path(self) -> str:
+        """
+        Pivot table output path for the configured PIVOT_FORMAT.
+        """
+        if self.pivot_format == "csv":
+            return self.pivot_csv_path
+        if self.pivot_format == "parquet":
+            return self.pivot_parquet_path
+        raise ValueError(
+            f"PIVOT_FORMAT must be 'parquet' or 'csv', got {self.pivot_format!r}"
+        )
+
+    @property
+    def stale_pivot_path(self) -> str:
+        """
+        Pivot path of the format *not* in use (removed on each run).
+        """
+        if self.pivot_path == self.pivot_csv_path:
+            return self.pivot_parquet_path
+        return self.pivot_csv_path
+
     @property
     def heatmap_png_path(self) -> str:
         return os.path.join(self.output_dir, "hr_heatmap.png")
@@ -54,6 +85,9 @@ class Settings:
         float(os.getenv("HR_MAX")) if os.getenv("HR_MAX") is not None else None
     )
 
+    # PNG zlib level (0-9); 1 encodes much faster than PIL's default 6
+    png_compress_level: int = int(os.getenv("PNG_COMPRESS_LEVEL", "1"))
+
     draw_hour_lines: bool = os.getenv("DRAW_HOUR_LINES", "true").lower() == "true"
     draw_day_lines: bool = os.getenv("DRAW_DAY_LINES", "true").lower() == "true"
 
@@ -78,11 +112,11 @@ class Settings:
 
     # Convenience: timezone object
     @property
-    def tz(self):
+    def tz(self) -> ZoneInfo:
         """
-        Return a pytz timezone object based on the configured timezone string.
+        Return a zoneinfo timezone object based on the configured timezone string.
         """
-        return pytz.timezone(self.timezone)
+        return ZoneInfo(self.timezone)
 
 
 # Single global settings instance
@@ -1,57 +1,129 @@
 # app/garmin_client.py
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timezone
+from datetime import date, datetime, time as dtime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
 
+import numpy as np
 from garminconnect import (
     Garmin,
     GarminConnectAuthenticationError,
     GarminConnectConnectionError,
     GarminConnectTooManyRequestsError,
 )
+from garth.exc import GarthHTTPError
 
 from .config import settings
 
+# Retry policy for Garmin rate limiting (HTTP 429)
+MAX_RETRIES = 5
+BACKOFF_BASE_SEC = 1.0
+
+# Per-day cache policy: a past day is treated as final once its last
+# sample is within CACHE_END_SLACK of local midnight, or once it is
+# CACHE_SETTLE_DAYS old (late syncs beyond that are not expected).
+CACHE_END_SLACK = timedelta(hours=1)
+CACHE_SETTLE_DAYS = 7
+
+
+def _is_auth_error(err: Exception) -> bool:
+    """
+    True if err means the Garmin session is no longer valid (HTTP 401).
+    """
+    if isinstance(err, GarminConnectAuthenticationError):
+        return True
+    if isinstance(err, GarthHTTPError):
+        response = getattr(err.error, "response", None)
+        return getattr(response, "status_code", None) == 401
+    return False
+
 
 @dataclass
-class Sample:
-    """Single heart-rate sample at a specific UTC timestamp."""
-    timestamp: datetime  # UTC
-    hr: int
+class HRDay:
+    """
+    One day of heart-rate samples as parallel arrays.
+
+    ts_ms: int64 UTC epoch milliseconds
+    hr:    int16 bpm
+    """
+    ts_ms: np.ndarray
+    hr: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "HRDay":
+        return cls(
+            ts_ms=np.empty(0, dtype=np.int64),
+            hr=np.empty(0, dtype=np.int16),
+        )
+
+    def __len__(self) -> int:
+        return int(self.ts_ms.size)
 
 
 class GarminClient:
     """
     Thin wrapper around python-garminconnect.
 
-    - Uses username/password from settings
-    - Calls client.get_heart_rates('YYYY-MM-DD')
-    - Returns heart-rate samples as a list[Sample]
+    - Reuses a saved garth session, else logs in with username/password
+    - Calls client.get_heart_rates('YYYY-MM-DD'), one day per worker thread
+    - Caches completed (past) days as .npz files under cache_dir/hr
+    - Returns heart-rate samples as HRDay (ts_ms / hr NumPy arrays)
     """
 
     def __init__(self, cache_dir: Path | str | None = None) -> None:
         self.cache_dir = Path(cache_dir or settings.cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hr_cache_dir = self.cache_dir / "hr"
+        self.hr_cache_dir.mkdir(parents=True, exist_ok=True)
         self._client: Garmin | None = None
+        self._login_lock = threading.Lock()
 
     # ---------- auth / low-level client ----------
 
-    def login(self) -> None:
+    @property
+    def token_dir(self) -> Path:
+        """Where the garth OAuth session is persisted between runs."""
+        return self.cache_dir / "garth"
+
+    def login(self, use_saved_session: bool = True) -> None:
         """
-        Log into Garmin Connect using GARMIN_USER / GARMIN_PASS.
+        Log into Garmin Connect.
 
-        Creates a Garmin() client and performs the login call.
+        Resumes the saved garth session from token_dir when there is one;
+        otherwise (or if it has expired) does a full GARMIN_USER /
+        GARMIN_PASS login and saves the new session for next time.
         """
+        if use_saved_session and self.token_dir.is_dir():
+            try:
+                client = Garmin()
+                client.login(tokenstore=str(self.token_dir))
+                self._client = client
+                return
+            except (FileNotFoundError, KeyError, ValueError):
+                # Missing/corrupt token files: fall back to a full login
+                pass
+            except (GarminConnectAuthenticationError, GarthHTTPError) as err:
+                # Expired/revoked session falls back to a full login;
+                # anything else (network, 5xx) is not a reason to re-auth
+                if not _is_auth_error(err):
+                    raise RuntimeError(f"Garmin login failed: {err}") from err
+            except (
+                GarminConnectConnectionError,
+                GarminConnectTooManyRequestsError,
+            ) as err:
+                raise RuntimeError(f"Garmin login failed: {err}") from err
+
         if not settings.garmin_user or not settings.garmin_pass:
             raise RuntimeError("GARMIN_USER and GARMIN_PASS must be set")
 
         try:
-            # Fresh client each time for now; we can add cookie/session caching later.
-            self._client = Garmin(settings.garmin_user, settings.garmin_pass)
-            self._client.login()
+            client = Garmin(settings.garmin_user, settings.garmin_pass)
+            client.login()
         except (
             GarminConnectAuthenticationError,
             GarminConnectConnectionError,
@@ -59,18 +131,60 @@ class GarminClient:
         ) as err:
             raise RuntimeError(f"Garmin login failed: {err}") from err
 
+        self._client = client
+        self.token_dir.mkdir(parents=True, exist_ok=True)
+        client.garth.dump(str(self.token_dir))
+
+    def _relogin(self, stale: Garmin) -> None:
+        """
+        Replace a client whose session was rejected with a fresh password
+        login. Threads that hit the same stale client only re-login once.
+        """
+        with self._login_lock:
+            if self._client is stale:
+                self._client = None
+                self.login(use_saved_session=False)
+
     @property
     def client(self) -> Garmin:
         """
         Convenience accessor: ensures we're logged in before use.
+
+        Safe to call from worker threads; only one of them performs the login.
         """
         if self._client is None:
-            self.login()
+            with self._login_lock:
+                if self._client is None:
+                    self.login()
         return self._client
 
     # ---------- high-level HR API ----------
 
-    def fetch_daily_hr(self, day: date) -> List[Sample]:
+    def _get_heart_rates(self, day_str: str) -> dict:
+        """
+        Call client.get_heart_rates, backing off exponentially on 429s.
+
+        If the session has been revoked or expired (401), log in again
+        once with the password and retry.
+        """
+        attempt = 0
+        relogged = False
+        while True:
+            client = self.client
+            try:
+                return client.get_heart_rates(day_str)
+            except GarminConnectTooManyRequestsError:
+                attempt += 1
+                if attempt >= MAX_RETRIES:
+                    raise
+                time.sleep(BACKOFF_BASE_SEC * 2 ** (attempt - 1))
+            except (GarminConnectAuthenticationError, GarthHTTPError) as err:
+                if relogged or not _is_auth_error(err):
+                    raise
+                self._relogin(client)
+                relogged = True
+
+    def fetch_daily_hr(self, day: date) -> HRDay:
         """
         Fetch raw heart-rate samples for a single day.
 
@@ -78,42 +192,113 @@ class GarminClient:
             client.get_heart_rates('YYYY-MM-DD')
 
         Typical response includes a 'heartRateValues' key with a list of
-        [timestamp_ms, bpm] entries. We convert that into a list[Sample].
+        [timestamp_ms, bpm] entries. We convert that into an HRDay.
         """
         day_str = day.strftime("%Y-%m-%d")
 
-        raw = self.client.get_heart_rates(day_str) or {}
+        raw = self._get_heart_rates(day_str) or {}
         values = raw.get("heartRateValues") or []
 
-        samples: List[Sample] = []
+        # Expected shape: [timestamp_ms, bpm]; skip nulls and weird entries
+        rows = [
+            entry
+            for entry in values
+            if isinstance(entry, (list, tuple))
+            and len(entry) == 2
+            and isinstance(entry[0], (int, float))
+            and isinstance(entry[1], (int, float))
+        ]
+        if not rows:
+            return HRDay.empty()
 
-        for entry in values:
-            # Expected shape: [timestamp_ms, bpm]
-            if not isinstance(entry, (list, tuple)) or len(entry) != 2:
-                continue
+        arr = np.asarray(rows, dtype=np.float64)  # (n, 2)
+        ts_ms, hr = arr[:, 0], arr[:, 1]
 
-            ts_ms, hr = entry
-            if hr is None:
-                continue
+        # Drop NaN/inf and values that won't fit the integer dtypes
+        # (rather than failing the whole day on one bad entry)
+        keep = (
+            np.isfinite(ts_ms)
+            & np.isfinite(hr)
+            & (np.abs(ts_ms) < 2.0 ** 53)
+            & (hr >= 0)
+            & (hr <= np.iinfo(np.int16).max)
+        )
+        return HRDay(
+            ts_ms=ts_ms[keep].astype(np.int64),
+            hr=hr[keep].astype(np.int16),
+        )
 
-            try:
-                ts = datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc)
-                samples.append(Sample(timestamp=ts, hr=int(hr)))
-            except Exception:
-                # Skip any weird entries rather than blowing up
-                continue
+    # ---------- per-day cache ----------
+
+    def _cache_path(self, day: date) -> Path:
+        return self.hr_cache_dir / f"{day.isoformat()}.npz"
+
+    def _load_cached_day(self, day: date) -> HRDay | None:
+        path = self._cache_path(day)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return HRDay(ts_ms=data["ts_ms"], hr=data["hr"])
+        except (OSError, ValueError, KeyError):
+            # Corrupt / partial file: ignore and refetch
+            return None
+
+    def _save_cached_day(self, day: date, samples: HRDay) -> None:
+        np.savez(self._cache_path(day), ts_ms=samples.ts_ms, hr=samples.hr)
 
-        return samples
+    def _is_complete_day(self, day: date, samples: HRDay, today: date) -> bool:
+        """
+        Whether a fetched past day is safe to cache (see CACHE_* above).
 
-    def fetch_range_hr(self, start: date, end: date) -> Dict[date, List[Sample]]:
+        Empty days are never cached, in case the watch hasn't synced yet.
+        """
+        if day >= today or not len(samples):
+            return False
+        if (today - day).days >= CACHE_SETTLE_DAYS:
+            return True
+
+        day_end = datetime.combine(
+            day + timedelta(days=1), dtime(), tzinfo=settings.tz
+        )
+        last_sample = datetime.fromtimestamp(
+            int(samples.ts_ms.max()) / 1000.0, tz=settings.tz
+        )
+        return day_end - last_sample <= CACHE_END_SLACK
+
+    def fetch_range_hr(self, start: date, end: date) -> Dict[date, HRDay]:
         """
         Fetch all-day HR samples for each date in [start, end].
 
-        Returns a dict mapping date -> list[Sample].
+        Returns a dict mapping date -> HRDay.
+
+        Past days (in settings.tz) that were cached once complete are
+        served from disk. Today, uncached days and days that were still
+        partly synced are fetched concurrently (settings.fetch_workers threads);
+        each call is a network round-trip, so this is I/O-bound.
         """
-        result: Dict[date, List[Sample]] = {}
-        current = start
-        while current <= end:
-            result[current] = self.fetch_daily_hr(current)
-            current = date.fromordinal(current.toordinal() + 1)
-        return result
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        today = datetime.now(settings.tz).date()
+
+        result: Dict[date, HRDay] = {}
+        for d in days:
+            if d < today:
+                cached = self._load_cached_day(d)
+                if cached is not None:
+                    result[d] = cached
+
+        missing = [d for d in days if d not in result]
+        if not missing:
+            return result
+
+        workers = max(1, min(settings.fetch_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            fetched = list(ex.map(self.fetch_daily_hr, missing))
+
+        for d, samples in zip(missing, fetched):
+            # Only cache days that look fully synced
+            if self._is_complete_day(d, samples, today):
+                self._save_cached_day(d, samples)
+            result[d] = samples
+
+        return {d: result[d] for d in days}
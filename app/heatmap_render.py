@@ -5,11 +5,11 @@ from datetime import date
 from typing import List
 
 import numpy as np
-from PIL import Image, ImageDraw
+from numba import njit, prange
+from PIL import Image
 
 import matplotlib
 matplotlib.use("Agg")  # non-interactive backend for headless Docker
-import matplotlib.cm as cm
 import matplotlib.colors as mcolors
 
 from .config import settings
@@ -57,7 +57,65 @@ def get_colormap(name: str) -> mcolors.Colormap:
         )
 
     # Fall back to any Matplotlib colormap (including 'turbo')
-    return cm.get_cmap(name)
+    return matplotlib.colormaps[name]
+
+
+def build_colormap_lut(cmap: mcolors.Colormap, n: int = 256) -> np.ndarray:
+    """
+    Sample a colormap into an (n, 3) uint8 RGB lookup table.
+    """
+    return (cmap(np.linspace(0.0, 1.0, n))[:, :3] * 255).astype(np.uint8)
+
+
+# Colormap name -> LUT; the configured colormap doesn't change at runtime
+_LUT_CACHE: dict[str, np.ndarray] = {}
+
+
+def _get_lut(name: str) -> np.ndarray:
+    """
+    Return the cached uint8 LUT for a colormap name, building it once.
+    """
+    lut = _LUT_CACHE.get(name)
+    if lut is None:
+        lut = build_colormap_lut(get_colormap(name))
+        _LUT_CACHE[name] = lut
+    return lut
+
+
+# fastmath without nnan/ninf: the kernel relies on NaN checks.
+@njit(
+    parallel=True,
+    fastmath={"nsz", "arcp", "contract", "afn", "reassoc"},
+    cache=True,
+)
+def _apply_cmap(data, lut, vmin, vmax, out):
+    """
+    Map a (H, W) float matrix into a preallocated (H, W, 3) uint8 buffer.
+
+    Values are scaled onto the LUT with the same floor(x * N) rule as
+    Matplotlib (clipped to [0, N-1]). NaN/inf and values <= 0 (missing
+    data) are drawn as black.
+    """
+    n_colors = lut.shape[0]
+    scale = n_colors / (vmax - vmin)
+    for i in prange(data.shape[0]):
+        for j in range(data.shape[1]):
+            v = data[i, j]
+            if not np.isfinite(v) or v <= 0:
+                out[i, j, 0] = 0
+                out[i, j, 1] = 0
+                out[i, j, 2] = 0
+                continue
+            x = (v - vmin) * scale
+            if x < 0.0:
+                k = 0
+            elif x >= n_colors - 1:
+                k = n_colors - 1
+            else:
+                k = int(x)
+            out[i, j, 0] = lut[k, 0]
+            out[i, j, 1] = lut[k, 1]
+            out[i, j, 2] = lut[k, 2]
 
 
 def _prepare_data_for_color(matrix: np.ndarray) -> np.ndarray:
@@ -73,6 +131,25 @@ def _prepare_data_for_color(matrix: np.ndarray) -> np.ndarray:
     return data
 
 
+def _percentiles(values: np.ndarray, qs: tuple[float, ...]) -> tuple[float, ...]:
+    """
+    Linear-interpolated percentiles (same as np.percentile's default) of
+    an already-finite 1-D array, using an O(n) np.partition instead of a
+    full sort.
+    """
+    n = values.size
+    positions = [q / 100.0 * (n - 1) for q in qs]
+    lows = [int(np.floor(p)) for p in positions]
+    highs = [min(lo + 1, n - 1) for lo in lows]
+    part = np.partition(values, sorted(set(lows + highs)))
+
+    out = []
+    for p, lo, hi in zip(positions, lows, highs):
+        frac = p - lo
+        out.append(float(part[lo] + (part[hi] - part[lo]) * frac))
+    return tuple(out)
+
+
 def calculate_color_scale(matrix: np.ndarray) -> tuple[float, float]:
     """
     Determine vmin/vmax for the colormap using either:
@@ -93,11 +170,17 @@ def calculate_color_scale(matrix: np.ndarray) -> tuple[float, float]:
     if getattr(settings, "hr_min", None) is not None and getattr(
         settings, "hr_max", None
     ) is not None:
-        return float(settings.hr_min), float(settings.hr_max)
+        vmin, vmax = float(settings.hr_min), float(settings.hr_max)
+        if vmin > vmax:
+            raise ValueError(
+                f"HR_MIN ({vmin}) must not be greater than HR_MAX ({vmax})"
+            )
+        if vmin == vmax:
+            vmin, vmax = vmin - 1.0, vmax + 1.0
+        return vmin, vmax
 
     # Robust scale like the original script
-    vmin = float(np.nanpercentile(finite, 1))
-    vmax = float(np.nanpercentile(finite, 99))
+    vmin, vmax = _percentiles(finite, (1.0, 99.0))
 
     # Fallback if degenerate
     if not np.isfinite(vmin) or not np.isfinite(vmax) or vmin == vmax:
@@ -109,6 +192,20 @@ def calculate_color_scale(matrix: np.ndarray) -> tuple[float, float]:
     return vmin, vmax
 
 
+def _repeat_pixels(rgb: np.ndarray, scale_y: int, scale_x: int) -> np.ndarray:
+    """
+    Nearest-neighbour upsample an (H, W, 3) image by integer factors.
+
+    Broadcasts each pixel into a (scale_y, scale_x) block as a strided
+    view, then materializes it with a single C-contiguous copy.
+    """
+    h, w, c = rgb.shape
+    blocks = np.broadcast_to(
+        rgb[:, None, :, None, :], (h, scale_y, w, scale_x, c)
+    )
+    return np.ascontiguousarray(blocks).reshape(h * scale_y, w * scale_x, c)
+
+
 def render_heatmap_image(
     matrix: np.ndarray,
     dates: List[date],
@@ -129,62 +226,59 @@ def render_heatmap_image(
 
     n_days = matrix.shape[1]
 
-    # Prepare data: treat <= 0 as missing (NaN)
-    data = _prepare_data_for_color(matrix)
+    # Compute color scale (prepares its own NaN-masked copy)
+    vmin, vmax = calculate_color_scale(matrix)
 
-    # Compute color scale
-    vmin, vmax = calculate_color_scale(data)
+    # Colormap (with Catppuccin Mocha support) sampled into a uint8 LUT
+    lut = _get_lut(_get_colormap_name())
 
-    # Colormap (with Catppuccin Mocha support)
-    cmap_name = _get_colormap_name()
-    cmap = get_colormap(cmap_name)
+    # Normalize, quantize and gather in one compiled pass; the kernel
+    # treats <= 0 / NaN as missing itself, so no prepared copy is needed
+    data = np.ascontiguousarray(matrix, dtype=np.float64)
+    rgb = np.empty((1440, n_days, 3), dtype=np.uint8)
+    _apply_cmap(data, lut, float(vmin), float(vmax), rgb)
 
-    # Clone colormap if needed so we can safely mutate it
-    try:
-        cmap = cmap.copy()
-    except AttributeError:
-        pass
+    # Base image: 1px/min, 1px/day, then scaled up.
+    # Integer scale factors are a plain pixel repeat, so do that in NumPy
+    # and only go through PIL's resampler for fractional ones.
+    out_w, out_h = settings.image_width, settings.image_height
+    if n_days and out_w % n_days == 0 and out_h % 1440 == 0:
+        big = _repeat_pixels(rgb, out_h // 1440, out_w // n_days)
+    else:
+        base = Image.fromarray(rgb, mode="RGB")
+        big = np.array(base.resize((out_w, out_h), resample=Image.NEAREST))
 
-    # Missing data (NaN) drawn as black, like the original script
-    cmap.set_bad(color=(0.0, 0.0, 0.0, 1.0))
-
-    # Normalize & map to RGBA
-    norm = mcolors.Normalize(vmin=vmin, vmax=vmax, clip=True)
-    rgba = cmap(norm(np.ma.masked_invalid(data)))  # (1440, N, 4), floats 0..1
-
-    # Convert to uint8 RGB
-    rgb = (rgba[..., :3] * 255).astype("uint8")  # (1440, N, 3)
-
-    # Base image: 1px/min, 1px/day, then scaled up
-    base = Image.fromarray(rgb, mode="RGB")
-    base = base.resize(
-        (settings.image_width, settings.image_height),
-        resample=Image.NEAREST,
-    )
-
-    draw = ImageDraw.Draw(base)
-    W, H = base.size
+    # Grid lines are written straight into the pixel buffer
+    H, W = big.shape[:2]
 
     # Horizontal hour lines
     if getattr(settings, "draw_hour_lines", True):
-        for h in range(0, 25):
-            y = round(h * H / 24)
-            draw.line([(0, y), (W - 1, y)], fill=(255, 255, 255), width=1)
+        ys = np.round(np.arange(25) * H / 24).astype(int)
+        big[ys[ys < H], :, :] = 255
 
     # Vertical day lines
     if getattr(settings, "draw_day_lines", True) and n_days > 1:
-        for i in range(1, n_days):
-            x = round(i * W / n_days)
-            draw.line([(x, 0), (x, H - 1)], fill=(255, 255, 255), width=1)
+        xs = np.round(np.arange(1, n_days) * W / n_days).astype(int)
+        big[:, xs[xs < W], :] = 255
 
     # Optional: date labels could be added here if desired
 
+    base = Image.fromarray(big, mode="RGB")
+
     return base
 
 
 def save_heatmap_png(matrix: np.ndarray, dates: List[date], path: str) -> None:
     """
     Render and save the heatmap PNG to the given path.
+
+    Uses a fast zlib level (settings.png_compress_level, default 1);
+    the flat colormapped image compresses nearly as well as at level 6.
     """
     img = render_heatmap_image(matrix, dates)
-    img.save(path, format="PNG")
+    img.save(
+        path,
+        format="PNG",
+        compress_level=settings.png_compress_level,
+        optimize=False,
+    )
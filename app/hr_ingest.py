@@ -6,41 +6,35 @@ import pandas as pd
 from datetime import datetime
 from typing import List, Tuple, Dict
 
-from .garmin_client import Sample
+from .garmin_client import HRDay
 from .config import settings
 
 
-def samples_to_local_minutes(samples: List[Sample]) -> Dict[int, List[int]]:
+def _fill_short_gaps(arr: np.ndarray, max_gap: int) -> np.ndarray:
     """
-    Convert raw timestamp samples to a dict:
-        minute_of_day -> list of HR samples (ints)
+    Linearly interpolate runs of NaN that are at most max_gap long.
 
-    Applies:
-    - Local timezone conversion
-    - Floor to lower minute
+    Runs at the start/end of the day are held at the nearest known value.
+    Longer runs are left as NaN in their entirety.
     """
-    tz = settings.tz
-    minute_map: Dict[int, List[int]] = {}
-
-    for s in samples:
-        # 1. Convert UTC timestamp -> local timezone
-        local_ts = s.timestamp.astimezone(tz)
-
-        # 2. Floor to lower minute
-        floored = local_ts.replace(second=0, microsecond=0)
-
-        # 3. Compute minute-of-day
-        minute_of_day = floored.hour * 60 + floored.minute
-
-        if minute_of_day not in minute_map:
-            minute_map[minute_of_day] = []
-
-        minute_map[minute_of_day].append(s.hr)
+    known = np.flatnonzero(~np.isnan(arr))
+    positions = np.arange(arr.size)
+    filled = np.interp(positions, known, arr[known])
+
+    # Length of the NaN run each position sits in, from the known
+    # samples on either side (-1 / arr.size when the run hits an edge)
+    nxt = np.searchsorted(known, positions)
+    left = np.where(nxt > 0, known[np.maximum(nxt - 1, 0)], -1)
+    right = np.where(
+        nxt < known.size, known[np.minimum(nxt, known.size - 1)], arr.size
+    )
+    gap_len = right - left - 1
 
-    return minute_map
+    filled[np.isnan(arr) & (gap_len > max_gap)] = np.nan
+    return filled
 
 
-def build_daily_minute_series(samples: List[Sample], max_gap: int = 10) -> np.ndarray:
+def build_daily_minute_series(samples: HRDay, max_gap: int = 10) -> np.ndarray:
     """
     Build the 1440-sample vector for one day.
 
@@ -51,29 +45,40 @@ def build_daily_minute_series(samples: List[Sample], max_gap: int = 10) -> np.nd
     - Leave long gaps as NaN
     - Replace NaN with 0 at the end (per user spec)
     """
+    # UTC epoch ms -> local minute_of_day (floored), converted per sample
+    # so days crossing a DST change land in the right minutes
+    local = pd.to_datetime(samples.ts_ms, unit="ms", utc=True).tz_convert(settings.tz)
+    minute = (local.hour * 60 + local.minute).to_numpy(dtype=np.int64)
+    hr = np.asarray(samples.hr, dtype=np.float64)
+
     # 1440 minutes/day
     arr = np.full(1440, np.nan, dtype=float)
 
-    minute_map = samples_to_local_minutes(samples)
-
-    # Fill known minutes with mean HR
-    for minute, vals in minute_map.items():
-        if vals:
-            arr[minute] = np.mean(vals)
+    if minute.size:
+        # Garmin returns samples in time order, so minutes are usually
+        # already sorted; only pay for the argsort when they aren't.
+        if np.any(minute[1:] < minute[:-1]):
+            order = np.argsort(minute, kind="stable")
+            minute = minute[order]
+            hr = hr[order]
+
+        # Start index of each run of identical minutes
+        starts = np.flatnonzero(np.r_[True, minute[1:] != minute[:-1]])
+        sums = np.add.reduceat(hr, starts)
+        counts = np.diff(np.r_[starts, minute.size])
+
+        # Fill known minutes with mean HR
+        arr[minute[starts]] = sums / counts
+
+    # Nothing to fill (no gaps) or nothing to fill from (no data)
+    n_nan = int(np.count_nonzero(np.isnan(arr)))
+    if n_nan == 0:
+        return arr
+    if n_nan == arr.size:
+        return np.zeros_like(arr)
 
     # --- Interpolate gaps up to max_gap minutes ---
-    # Use pandas Series for easy interpolation
-    s = pd.Series(arr)
-
-    # Interpolate *only inside gaps* and limit gap size
-    s_interpolated = s.interpolate(
-        method="linear",
-        limit=max_gap,
-        limit_direction="both"
-    )
-
-    # Convert to numpy
-    arr_interp = s_interpolated.to_numpy()
+    arr_interp = _fill_short_gaps(arr, max_gap)
 
     # --- Replace remaining NaNs with 0 (your spec) ---
     # These represent longer than max_gap gaps
@@ -83,11 +88,11 @@ def build_daily_minute_series(samples: List[Sample], max_gap: int = 10) -> np.nd
 
 
 def build_daily_table(
-    daily_data: Dict[datetime.date, List[Sample]],
+    daily_data: Dict[datetime.date, HRDay],
     tz=None
 ) -> Tuple[np.ndarray, List[datetime.date]]:
     """
-    Convert dict[date -> samples] into:
+    Convert dict[date -> HRDay] into:
         (1440 × N matrix, sorted_dates)
 
     Where each column = one day vector.
@@ -103,6 +108,7 @@ def build_daily_table(
         # Return empty table if nothing exists
         return np.zeros((1440, 0)), []
 
-    matrix = np.column_stack(cols)  # shape = (1440, N)
+    # shape = (1440, N), row-major: CSV rows and image rows are minutes
+    matrix = np.stack(cols, axis=1)
 
     return matrix, sorted_dates
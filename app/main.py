@@ -14,6 +14,18 @@ from .orchestrator import run_full_pipeline, load_status
 
 app = FastAPI(title="HR Heatmap Service")
 
+# Serializes pipeline runs (scheduler, /heatmap.png, /force-rebuild)
+_pipeline_lock = asyncio.Lock()
+
+
+async def _run_pipeline_locked() -> dict:
+    """
+    Run the pipeline in a worker thread so the event loop stays responsive,
+    one run at a time.
+    """
+    async with _pipeline_lock:
+        return await asyncio.to_thread(run_full_pipeline)
+
 
 def _next_run_time_utc(now: datetime) -> datetime:
     """Compute the next daily run time in UTC (very simple scheduler)."""
@@ -35,7 +47,7 @@ async def scheduler_loop():
     """
     # Initial run (you can add staleness checks if desired)
     try:
-        run_full_pipeline()
+        await _run_pipeline_locked()
     except Exception as e:
         # In a real implementation, log this error
         print(f"[scheduler] Initial pipeline run failed: {e}")
@@ -47,7 +59,7 @@ async def scheduler_loop():
         await asyncio.sleep(max(sleep_seconds, 60))  # at least 60s
 
         try:
-            run_full_pipeline()
+            await _run_pipeline_locked()
         except Exception as e:
             print(f"[scheduler] Daily pipeline run failed: {e}")
 
@@ -67,7 +79,10 @@ async def get_heatmap():
     """
     if not Path(settings.heatmap_png_path).exists():
         try:
-            run_full_pipeline()
+            async with _pipeline_lock:
+                # Another request may have built it while we waited
+                if not Path(settings.heatmap_png_path).exists():
+                    await asyncio.to_thread(run_full_pipeline)
         except Exception as e:
             return JSONResponse(
                 status_code=500,
@@ -106,7 +121,7 @@ async def force_rebuild():
     Manually trigger a full pipeline run.
     """
     try:
-        status = run_full_pipeline()
+        status = await _run_pipeline_locked()
         return status
     except Exception as e:
         return JSONResponse(
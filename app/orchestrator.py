@@ -2,36 +2,70 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 import numpy as np
 
 from .config import settings
-from .pivot_builder import build_table_for_last_n_days, write_pivot_csv
+from .pivot_builder import build_table_for_last_n_days, write_pivot
 from .heatmap_render import save_heatmap_png
 
 
+@contextmanager
+def _atomic_output(path: str | Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `path` (same suffix, so format
+    dispatch still works); on success it is os.replace()d onto `path`.
+
+    HTTP handlers read these files while a rebuild runs in a worker
+    thread, so they must only ever see a complete file.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix
+    )
+    os.close(fd)
+    tmp = Path(tmp_name)
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600; keep normal output perms
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
 def run_full_pipeline() -> Dict[str, Any]:
     """
-    Fetch data from Garmin, build 1440xN table, write CSV and PNG,
+    Fetch data from Garmin, build 1440xN table, write pivot and PNG,
     and update meta.json.
 
     Returns a simple status dict.
     """
     Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
 
+    # Resolve the pivot path up front so a bad PIVOT_FORMAT fails before
+    # any Garmin fetching
+    pivot_path = settings.pivot_path
+
     # 1. Build matrix + date list
     matrix, dates = build_table_for_last_n_days(
         settings.trailing_days, settings.timezone
     )
 
-    # 2. Persist pivot CSV
-    write_pivot_csv(matrix, dates, settings.pivot_csv_path)
+    # 2. Persist pivot table (Parquet, or CSV if PIVOT_FORMAT=csv), and
+    #    drop the other format's file so nobody reads a stale copy
+    with _atomic_output(pivot_path) as tmp:
+        write_pivot(matrix, dates, tmp)
+    Path(settings.stale_pivot_path).unlink(missing_ok=True)
 
     # 3. Render heatmap PNG
-    save_heatmap_png(matrix, dates, settings.heatmap_png_path)
+    with _atomic_output(settings.heatmap_png_path) as tmp:
+        save_heatmap_png(matrix, dates, str(tmp))
 
     # 4. Save meta
     status = {
@@ -42,8 +76,9 @@ def run_full_pipeline() -> Dict[str, Any]:
         "trailing_days_requested": settings.trailing_days,
     }
 
-    with open(settings.meta_json_path, "w", encoding="utf-8") as f:
-        json.dump(status, f, indent=2)
+    with _atomic_output(settings.meta_json_path) as tmp:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
 
     return status
 
@@ -5,12 +5,27 @@ import csv
 from datetime import date, timedelta
 from pathlib import Path
 import numpy as np
+import pandas as pd
 
 from .hr_ingest import build_daily_table
 from .garmin_client import GarminClient
 from .config import settings
 
 
+# One logged-in client shared across pipeline runs
+_client: GarminClient | None = None
+
+
+def get_client() -> GarminClient:
+    """
+    Return the process-wide GarminClient, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = GarminClient(cache_dir=settings.cache_dir)
+    return _client
+
+
 def build_table_for_last_n_days(
     n: int,
     tz_name: str | None = None,  # kept for compatibility with orchestrator
@@ -22,10 +37,9 @@ def build_table_for_last_n_days(
     today = date.today()
     start = today - timedelta(days=n - 1)
 
-    client = GarminClient(cache_dir=settings.cache_dir)
-    client.login()
+    client = get_client()
 
-    # Fetch daily samples
+    # Fetch daily samples (logs in lazily if anything needs the network)
     daily_data = client.fetch_range_hr(start, today)
 
     matrix, dates = build_daily_table(daily_data)
@@ -33,6 +47,41 @@ def build_table_for_last_n_days(
     return matrix, dates
 
 
+def _minute_labels() -> list[str]:
+    """HH:MM labels for the 1440 minutes of a day."""
+    return [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)]
+
+
+def write_pivot(matrix: np.ndarray, dates: list[date], path: str | Path) -> None:
+    """
+    Write the pivot table, choosing the format from the file suffix:
+    .csv -> legacy CSV, anything else -> zstd-compressed Parquet.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        write_pivot_csv(matrix, dates, path)
+    else:
+        write_pivot_parquet(matrix, dates, path)
+
+
+def write_pivot_parquet(
+    matrix: np.ndarray, dates: list[date], parquet_path: str | Path
+) -> None:
+    """
+    Write the pivot table as Parquet:
+    index time_local (HH:MM), one float column per YYYY-MM-DD.
+    """
+    parquet_path = Path(parquet_path)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+
+    df = pd.DataFrame(
+        matrix,
+        columns=[d.isoformat() for d in dates],
+        index=pd.Index(_minute_labels(), name="time_local"),
+    )
+    df.to_parquet(parquet_path, compression="zstd", compression_level=3)
+
+
 def write_pivot_csv(matrix: np.ndarray, dates: list[date], csv_path: str | Path) -> None:
     """
     Write the canonical CSV table:
@@ -48,21 +97,24 @@ def write_pivot_csv(matrix: np.ndarray, dates: list[date], csv_path: str | Path)
         header = ["time_local"] + [d.isoformat() for d in dates]
         writer.writerow(header)
 
-        # Rows: HH:MM, hr_day1, hr_day2, ...
-        for minute in range(1440):
-            hh = minute // 60
-            mm = minute % 60
-            time_str = f"{hh:02d}:{mm:02d}"
-            row = [time_str] + list(matrix[minute, :])
-            writer.writerow(row)
+        # Rows: HH:MM, hr_day1, hr_day2, ... written in one bulk call
+        writer.writerows(
+            [time_str] + row
+            for time_str, row in zip(_minute_labels(), matrix.tolist())
+        )
 
 
-def load_pivot(csv_path: str | Path) -> tuple[np.ndarray, list[str]]:
+def load_pivot(path: str | Path) -> tuple[np.ndarray, list[str]]:
     """
-    Read pivot CSV back into matrix + date headers (not often needed).
+    Read a pivot table (CSV or Parquet) back into matrix + date headers
+    (not often needed).
     """
-    csv_path = Path(csv_path)
-    with csv_path.open("r") as f:
+    path = Path(path)
+    if path.suffix.lower() != ".csv":
+        df = pd.read_parquet(path)
+        return df.to_numpy(dtype=float), [str(c) for c in df.columns]
+
+    with path.open("r") as f:
         rows = list(csv.reader(f))
 
     header = rows[0][1:]  # skip time_local